@@ -7,10 +7,35 @@ This script parses JUnit XML test results and applies quality gates based on tes
 - Low severity failures → PASS with warning (allow PR merge with annotation)
 """
 
+import argparse
+import glob
+import re
 import sys
-import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from typing import Dict, List, Tuple
 
+# Prefer lxml (libxml2, C-level parsing) for large JUnit reports; fall back to
+# the stdlib parser so the gate still runs on runners without lxml installed.
+try:
+    from lxml import etree as ET
+    # Skip DTD entity expansion, whitespace-only text nodes and the xml:id
+    # lookup table, and lift libxml2's depth/size limits for very large
+    # reports. Events are filtered to <testcase> inside libxml2, so no other
+    # element reaches Python.
+    _PARSER_OPTIONS = {
+        'resolve_entities': False,
+        'remove_blank_text': True,
+        'huge_tree': True,
+        'collect_ids': False,
+        'tag': 'testcase',
+    }
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _PARSER_OPTIONS = {}
+
 # Define severity mapping based on test names/docstrings
 SEVERITY_MAPPING = {
     # Critical severity - Block merge
@@ -26,16 +51,79 @@ SEVERITY_MAPPING = {
     'test_api_down_500_retry_success': 'Low',
 }
 
+# Markdown summary consumed by the "Comment PR" workflow step
+SUMMARY_FILE = '.github/scripts/test-summary.md'
+
+# Markdown summary sections, filled in by write_summary
+SUMMARY_HEADER_FMT = """## Test Results Summary
+
+**Status:** {status}
+
+### Statistics
+- **Total Tests:** {total}
+- **Passed:** {passed}
+- **Failed:** {failed}
+
+### Failure Severity Breakdown
+- **Critical:** {critical_failed}
+- **High:** {high_failed}
+- **Low:** {low_failed}
+
+"""
+SUMMARY_FAILED_TESTS_HEADER = "\n### Failed Tests\n\n"
+SUMMARY_FOOTER_BLOCKED = (
+    "\n### Quality Gate Decision\n"
+    "**PR MERGE BLOCKED** - Critical or High severity test failures detected.\n"
+    "Please fix these issues before merging.\n"
+)
+SUMMARY_FOOTER_ALLOWED = (
+    "\n### Quality Gate Decision\n"
+    "**PR MERGE ALLOWED** - Only low-severity failures detected.\n"
+    "Manual review recommended before merging.\n"
+)
+SUMMARY_FOOTER_ALL_PASSED = "\n### All Tests Passed!\n"
+
+# Failure messages are truncated to this many characters when captured
+MAX_MESSAGE_LENGTH = 512
+
+# Stats counter incremented for each failed test, by severity
+SEVERITY_STAT_KEYS = {
+    'Critical': 'critical_failed',
+    'High': 'high_failed',
+    'Low': 'low_failed',
+}
+
+# Single alternation over all mapped names, used for partial matches
+_SEVERITY_PATTERN = re.compile('|'.join(map(re.escape, SEVERITY_MAPPING)))
+
+@lru_cache(maxsize=4096)
 def get_test_severity(test_name: str) -> str:
     """
     Determine the severity level of a test based on its name.
     Default to 'High' if not explicitly mapped.
     """
-    for pattern, severity in SEVERITY_MAPPING.items():
-        if pattern in test_name:
-            return severity
+    # Fast path: exact match on the name without its pytest parameter suffix
+    severity = SEVERITY_MAPPING.get(test_name.split('[', 1)[0])
+    if severity is not None:
+        return severity
+    
+    # Fallback: legacy partial match against any mapped pattern
+    match = _SEVERITY_PATTERN.search(test_name)
+    if match:
+        return SEVERITY_MAPPING[match.group(0)]
     return 'High'  # Default to High for safety
 
+def _release(elem) -> None:
+    """
+    Free a processed element during streaming parse.
+    With lxml, already-handled siblings are also detached from the parent
+    so memory stays bounded by a single testcase.
+    """
+    elem.clear()
+    if hasattr(elem, 'getprevious'):
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
 def parse_junit_xml(xml_file: str) -> Tuple[List[Dict], Dict[str, int]]:
     """
     Parse JUnit XML file and extract test results.
@@ -44,57 +132,79 @@ def parse_junit_xml(xml_file: str) -> Tuple[List[Dict], Dict[str, int]]:
         - List of failed tests with severity
         - Summary statistics
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    
     failed_tests = []
-    stats = {
+    stats = Counter({
         'total': 0,
         'passed': 0,
         'failed': 0,
         'critical_failed': 0,
         'high_failed': 0,
         'low_failed': 0
-    }
-    
-    # Parse testsuite(s)
-    testsuites = root.findall('.//testsuite')
-    if not testsuites:
-        testsuites = [root] if root.tag == 'testsuite' else []
+    })
     
-    for testsuite in testsuites:
-        for testcase in testsuite.findall('testcase'):
-            test_name = testcase.get('name', '')
-            classname = testcase.get('classname', '')
-            
-            stats['total'] += 1
+    # Stream testcases instead of building the whole DOM: large reports carry
+    # full stdout/stderr per failure, so each testcase is released once handled.
+    for _, testcase in ET.iterparse(xml_file, events=('end',), **_PARSER_OPTIONS):
+        if testcase.tag != 'testcase':  # stdlib parser reports every element
+            continue
+        
+        get = testcase.get
+        test_name = get('name', '')
+        classname = get('classname', '')
+        
+        stats['total'] += 1
+        
+        # Check if test failed; passing testcases are usually childless,
+        # so the child lookups are skipped for them
+        failure = error = None
+        if len(testcase):
+            find = testcase.find
+            failure = find('failure')
+            error = find('error')
+        
+        if failure is not None or error is not None:
+            severity = get_test_severity(test_name)
+            failure_message = (failure.get('message', '') if failure is not None else error.get('message', ''))[:MAX_MESSAGE_LENGTH]
             
-            # Check if test failed
-            failure = testcase.find('failure')
-            error = testcase.find('error')
+            failed_tests.append({
+                'name': test_name,
+                'classname': classname,
+                'severity': severity,
+                'message': failure_message
+            })
             
-            if failure is not None or error is not None:
-                severity = get_test_severity(test_name)
-                failure_message = failure.get('message', '') if failure is not None else error.get('message', '')
-                
-                failed_tests.append({
-                    'name': test_name,
-                    'classname': classname,
-                    'severity': severity,
-                    'message': failure_message
-                })
-                
-                stats['failed'] += 1
-                if severity == 'Critical':
-                    stats['critical_failed'] += 1
-                elif severity == 'High':
-                    stats['high_failed'] += 1
-                elif severity == 'Low':
-                    stats['low_failed'] += 1
-            else:
-                stats['passed'] += 1
-    
-    return failed_tests, stats
+            stats['failed'] += 1
+            stats[SEVERITY_STAT_KEYS[severity]] += 1
+        else:
+            stats['passed'] += 1
+        
+        _release(testcase)
+    
+    return failed_tests, dict(stats)
+
+def parse_junit_files(xml_files: List[str]) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Parse one or more JUnit XML shards and merge their results.
+    
+    Shards are parsed in parallel worker processes; a single file is parsed
+    in-process to avoid the pool startup cost.
+    """
+    if len(xml_files) == 1:
+        return parse_junit_xml(xml_files[0])
+    
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(parse_junit_xml, xml_files))
+    
+    failed_tests = list(chain.from_iterable(shard_failed for shard_failed, _ in results))
+    stats = Counter()
+    for _, shard_stats in results:
+        stats.update(shard_stats)  # update() keeps zero counts, unlike Counter addition
+    
+    return failed_tests, dict(stats)
+
+def _write_lines(lines: List[str]) -> None:
+    """Write buffered report lines to stdout in a single call."""
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 def apply_quality_gate(failed_tests: List[Dict], stats: Dict[str, int]) -> int:
     """
@@ -105,102 +215,99 @@ def apply_quality_gate(failed_tests: List[Dict], stats: Dict[str, int]) -> int:
     
     Returns exit code for the CI job.
     """
-    print("\n" + "="*70)
-    print("QUALITY GATE ANALYSIS")
-    print("="*70)
-    
-    print(f"\nTest Summary:")
-    print(f"  Total Tests: {stats['total']}")
-    print(f"  Passed: {stats['passed']}")
-    print(f"  Failed: {stats['failed']}")
+    lines = [
+        "\n" + "="*70,
+        "QUALITY GATE ANALYSIS",
+        "="*70,
+        "\nTest Summary:",
+        f"  Total Tests: {stats['total']}",
+        f"  Passed: {stats['passed']}",
+        f"  Failed: {stats['failed']}",
+    ]
     
     if stats['failed'] == 0:
-        print("\n✅ ALL TESTS PASSED - Quality Gate: PASS")
+        lines.append("\n✅ ALL TESTS PASSED - Quality Gate: PASS")
+        _write_lines(lines)
         write_summary("✅ All tests passed", stats, failed_tests)
         return 0
     
-    print(f"\nFailure Breakdown by Severity:")
-    print(f"  🔴 Critical: {stats['critical_failed']}")
-    print(f"  🟠 High: {stats['high_failed']}")
-    print(f"  🟡 Low: {stats['low_failed']}")
+    lines.extend([
+        "\nFailure Breakdown by Severity:",
+        f"  🔴 Critical: {stats['critical_failed']}",
+        f"  🟠 High: {stats['high_failed']}",
+        f"  🟡 Low: {stats['low_failed']}",
+    ])
     
     # Check for Critical or High severity failures
     if stats['critical_failed'] > 0 or stats['high_failed'] > 0:
-        print("\n❌ QUALITY GATE: FAILED")
-        print("🚫 PR merge blocked due to Critical/High severity test failures")
-        print("\nFailed Tests (blocking):")
+        lines.append("\n❌ QUALITY GATE: FAILED")
+        lines.append("🚫 PR merge blocked due to Critical/High severity test failures")
+        lines.append("\nFailed Tests (blocking):")
         for test in failed_tests:
             if test['severity'] in ['Critical', 'High']:
-                print(f"  - [{test['severity']}] {test['name']}")
-                print(f"    Message: {test['message'][:100]}")
+                lines.append(f"  - [{test['severity']}] {test['name']}")
+                lines.append(f"    Message: {test['message']}")
         
+        _write_lines(lines)
         write_summary("❌ Quality Gate FAILED - PR blocked", stats, failed_tests)
         return 1
     
     # Only Low severity failures
     if stats['low_failed'] > 0:
-        print("\n⚠️  QUALITY GATE: PASSED WITH WARNINGS")
-        print("✅ PR merge allowed (only low-severity failures)")
-        print("⚠️  Manual review recommended for:")
+        lines.append("\n⚠️  QUALITY GATE: PASSED WITH WARNINGS")
+        lines.append("✅ PR merge allowed (only low-severity failures)")
+        lines.append("⚠️  Manual review recommended for:")
         for test in failed_tests:
             if test['severity'] == 'Low':
-                print(f"  - [{test['severity']}] {test['name']}")
+                lines.append(f"  - [{test['severity']}] {test['name']}")
         
+        _write_lines(lines)
         write_summary("⚠️  Quality Gate PASSED with warnings", stats, failed_tests)
         return 0
     
+    _write_lines(lines)
     return 0
 
 def write_summary(status: str, stats: Dict[str, int], failed_tests: List[Dict]):
     """Write a markdown summary for PR comments."""
-    summary = f"""## Test Results Summary
-
-**Status:** {status}
-
-### Statistics
-- **Total Tests:** {stats['total']}
-- **Passed:** {stats['passed']}
-- **Failed:** {stats['failed']}
-
-### Failure Severity Breakdown
-- **Critical:** {stats['critical_failed']}
-- **High:** {stats['high_failed']}
-- **Low:** {stats['low_failed']}
-
-"""
+    parts = [SUMMARY_HEADER_FMT.format(status=status, **stats)]
     
     if failed_tests:
-        summary += "\n### Failed Tests\n\n"
-        for test in failed_tests:
-            summary += f"- **[{test['severity']}]** `{test['name']}`\n"
+        parts.append(SUMMARY_FAILED_TESTS_HEADER)
+        parts.extend(f"- **[{test['severity']}]** `{test['name']}`\n" for test in failed_tests)
         
         # Add quality gate decision
         if stats['critical_failed'] > 0 or stats['high_failed'] > 0:
-            summary += "\n### Quality Gate Decision\n"
-            summary += "**PR MERGE BLOCKED** - Critical or High severity test failures detected.\n"
-            summary += "Please fix these issues before merging.\n"
+            parts.append(SUMMARY_FOOTER_BLOCKED)
         else:
-            summary += "\n### Quality Gate Decision\n"
-            summary += "**PR MERGE ALLOWED** - Only low-severity failures detected.\n"
-            summary += "Manual review recommended before merging.\n"
+            parts.append(SUMMARY_FOOTER_ALLOWED)
     else:
-        summary += "\n### All Tests Passed!\n"
-    
-    # Write to file for GitHub Actions
-    with open('.github/scripts/test-summary.md', 'w', encoding='utf-8') as f:
-        f.write(summary)
+        parts.append(SUMMARY_FOOTER_ALL_PASSED)
     
-    print("\n" + summary)
+    # Write once to the file the PR comment step reads; the gate analysis
+    # above already went to stdout, so the markdown is not echoed again.
+    with open(SUMMARY_FILE, 'wb') as f:
+        f.write(''.join(parts).encode('utf-8'))
+
+def _expand_paths(patterns: List[str]) -> List[str]:
+    """Expand glob patterns; paths that match nothing are kept so parsing reports them."""
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return paths
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python quality_gate.py <junit-xml-file>")
-        sys.exit(1)
-    
-    xml_file = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Apply severity-based quality gates to JUnit XML test results."
+    )
+    parser.add_argument(
+        'xml_files', nargs='+', metavar='junit-xml-file',
+        help="JUnit XML report(s) or glob pattern(s), e.g. 'results/shard-*.xml'"
+    )
+    args = parser.parse_args()
     
     try:
-        failed_tests, stats = parse_junit_xml(xml_file)
+        failed_tests, stats = parse_junit_files(_expand_paths(args.xml_files))
         exit_code = apply_quality_gate(failed_tests, stats)
         sys.exit(exit_code)
     except Exception as e:
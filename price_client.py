@@ -1,12 +1,35 @@
 # price_client.py
 import requests
 import time
+from typing import Callable
+from requests.adapters import HTTPAdapter
 from exceptions import PriceCriticalError, RateLimitError
 
+# Decode payloads straight from the raw body with orjson when available
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
 # Configuration constants
 MAX_RETRIES = 3
 BACKOFF_FACTOR = 0.5  # Time to wait between retries (0.5s, 1s, 2s...)
 
+# Shared session: keep-alive connections are pooled and reused across calls
+# instead of paying a new TCP/TLS handshake per request. Retries are handled
+# by get_hyperliquid_price, so the adapter itself never retries.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+
+def _backoff_or_raise(attempt: int, error_message: Callable[[], str]) -> None:
+    """
+    Waits before the next attempt, or raises PriceCriticalError if this was the last one.
+    The error message is only built when raising.
+    """
+    if attempt >= MAX_RETRIES - 1:
+        raise PriceCriticalError(error_message())
+    time.sleep(BACKOFF_FACTOR * (1 << attempt))
+
 def get_hyperliquid_price(symbol: str) -> float:
     """
     Fetches the hyperliquid price for a given symbol, with resilience logic.
@@ -17,20 +40,16 @@ def get_hyperliquid_price(symbol: str) -> float:
     
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.get(url, timeout=5)
+            response = SESSION.get(url, timeout=5)
             
             # --- API Down/Server Error (5xx) ---
             if response.status_code >= 500:
                 print(f"Server error {response.status_code} on attempt {attempt + 1}. Retrying...")
-                # Transient error, we continue to retry
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(BACKOFF_FACTOR * (2 ** attempt))
-                    continue
-                else:
-                    # Critical failure after all retries
-                    raise PriceCriticalError(
-                        f"API down: Failed after {MAX_RETRIES} attempts. Status: {response.status_code}"
-                    )
+                # Transient error, we continue to retry (critical failure after all retries)
+                _backoff_or_raise(
+                    attempt, lambda: f"API down: Failed after {MAX_RETRIES} attempts. Status: {response.status_code}"
+                )
+                continue
 
             # --- Rate Limit (429) ---
             if response.status_code == 429:
@@ -52,7 +71,7 @@ def get_hyperliquid_price(symbol: str) -> float:
             # --- Normal Response (200 OK) ---
             response.raise_for_status() # Raises for 4xx clients errors (except 429 handled above)
 
-            data = response.json()
+            data = _json_loads(response.content)
             price_value = data.get("price")
 
             # --- Bad Data Cases ---
@@ -74,23 +93,11 @@ def get_hyperliquid_price(symbol: str) -> float:
             raise
         except requests.exceptions.Timeout:
             print(f"Request timeout on attempt {attempt + 1}. Retrying...")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(BACKOFF_FACTOR * (2 ** attempt))
-                continue
-            else:
-                raise PriceCriticalError(
-                    f"Connection Timeout: Failed after {MAX_RETRIES} attempts."
-                )
+            _backoff_or_raise(attempt, lambda: f"Connection Timeout: Failed after {MAX_RETRIES} attempts.")
         except requests.exceptions.ConnectionError as e:
             # Handle DNS/network issues
             print(f"Connection error on attempt {attempt + 1}. Retrying...")
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(BACKOFF_FACTOR * (2 ** attempt))
-                continue
-            else:
-                raise PriceCriticalError(
-                    f"Network Error: Failed after {MAX_RETRIES} attempts. {e}"
-                )
+            _backoff_or_raise(attempt, lambda: f"Network Error: Failed after {MAX_RETRIES} attempts. {e}")
         except Exception as e:
             # Catch all other exceptions (e.g., JSON decode error)
             raise PriceCriticalError(f"Unexpected error during fetch: {e}") from e
@@ -1,34 +1,74 @@
 # test_price.py
+import json
 import pytest
-from unittest.mock import MagicMock
-from requests import Response
-from price_client import get_hyperliquid_price, MAX_RETRIES
+from unittest.mock import call, patch
+import price_client
+from price_client import get_hyperliquid_price
 from exceptions import PriceCriticalError, RateLimitError
 
+class StubResponse:
+    """Lightweight stand-in for requests.Response with only what price_client reads."""
+
+    def __init__(self, status_code=200, json_data=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+        self._json_data = json_data if json_data is not None else {}
+        self.content = json.dumps(self._json_data).encode()
+
+    def json(self):
+        return self._json_data
+
+    def raise_for_status(self):
+        pass
+
 # Helper fixture to create a mock response object
-@pytest.fixture
-def mock_response(mocker):
-    """Fixture to create a mock requests.Response object."""
-    def _mock_response(status_code=200, json_data=None, headers=None):
-        resp = mocker.MagicMock(spec=Response)
-        resp.status_code = status_code
-        resp.json.return_value = json_data if json_data is not None else {}
-        resp.raise_for_status = MagicMock()
-        resp.headers = headers if headers is not None else {}
-        return resp
-    return _mock_response
+@pytest.fixture(scope="session")
+def mock_response():
+    """Fixture to create a stub requests.Response object."""
+    return StubResponse
+
+# Backoff between retries is irrelevant to the assertions; skip real sleeps
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    """Fixture to make time.sleep in the retry loop return immediately."""
+    with patch('price_client.time.sleep', return_value=None) as mock_sleep:
+        yield mock_sleep
+
+# Exhaustion semantics hold for any limit; a smaller one means fewer mocked attempts
+@pytest.fixture(autouse=True)
+def shrink_retries(monkeypatch):
+    """Fixture to lower price_client.MAX_RETRIES for the duration of a test."""
+    monkeypatch.setattr('price_client.MAX_RETRIES', 2)
+
+# Every test stubs the HTTP call; install one dispatcher instead of a patcher per test
+@pytest.fixture(autouse=True)
+def patch_session_get(monkeypatch):
+    """
+    Fixture to replace price_client.SESSION.get with a lightweight dispatcher.
+    Tests set 'return_value' or a 'side_effect' list of responses; 'calls'
+    counts the requests made.
+    """
+    stub = {'side_effect': None, 'return_value': None, 'calls': 0}
+
+    def fake_get(*args, **kwargs):
+        stub['calls'] += 1
+        if stub['side_effect'] is not None:
+            return stub['side_effect'][stub['calls'] - 1]
+        return stub['return_value']
+
+    monkeypatch.setattr('price_client.SESSION.get', fake_get)
+    return stub
 
 # ----------------------------------------------------
 # 1. Normal Case (200 OK)
 # ----------------------------------------------------
 
-def test_normal_case_200_ok(mocker, mock_response):
+def test_normal_case_200_ok(patch_session_get, mock_response):
     """
     Severity: Low. Mock a valid response with a positive numeric price.
     Assert the function returns the expected float.
     """
-    mock_resp = mock_response(json_data={"price": 1234.56})
-    mocker.patch('requests.get', return_value=mock_resp)
+    patch_session_get['return_value'] = mock_response(json_data={"price": 1234.56})
     
     price = get_hyperliquid_price("ETH")
     assert price == 1234.56
@@ -38,43 +78,53 @@ def test_normal_case_200_ok(mocker, mock_response):
 # 2. API Down (500 Error)
 # ----------------------------------------------------
 
-def test_api_down_500_retry_success(mocker, mock_response):
+def test_api_down_500_retry_success(patch_session_get, mock_response, no_backoff_sleep):
     """
     Severity: Low. Mock transient 500 errors followed by success.
-    Assert the function succeeds and the API call is made N times.
+    Assert the function succeeds, the API call is made N times and
+    backoff waits before each retry.
     """
     mock_resp_fail = mock_response(status_code=500)
     mock_resp_success = mock_response(json_data={"price": 100.0})
     
-    # Fail twice, succeed on the third attempt (MAX_RETRIES=3)
-    mock_get = mocker.patch(
-        'requests.get', 
-        side_effect=[mock_resp_fail, mock_resp_fail, mock_resp_success]
-    )
+    # Fail on every attempt but the last, then succeed
+    patch_session_get['side_effect'] = [mock_resp_fail] * (price_client.MAX_RETRIES - 1) + [mock_resp_success]
     
     price = get_hyperliquid_price("BTC")
     assert price == 100.0
-    # The call should be made MAX_RETRIES times (3)
-    assert mock_get.call_count == MAX_RETRIES
+    # The call should be made MAX_RETRIES times
+    assert patch_session_get['calls'] == price_client.MAX_RETRIES
+    assert no_backoff_sleep.call_args_list == [call(0.5)]
 
-def test_api_down_500_critical_failure(mocker, mock_response):
+def test_api_down_500_critical_failure(patch_session_get, mock_response):
     """
     Severity: Critical. Mock 500 on all N attempts.
     Assert: Retry N times, then raise PriceCriticalError.
     """
     mock_resp_fail = mock_response(status_code=500)
     
-    # Fail MAX_RETRIES times (3)
-    mock_get = mocker.patch(
-        'requests.get', 
-        return_value=mock_resp_fail
-    )
+    # Fail MAX_RETRIES times
+    patch_session_get['return_value'] = mock_resp_fail
+    
+    with pytest.raises(PriceCriticalError, match=rf"Failed after {price_client.MAX_RETRIES} attempts"):
+        get_hyperliquid_price("SOL")
+        
+    assert patch_session_get['calls'] == price_client.MAX_RETRIES
+
+def test_api_down_500_critical_failure_raised_limit(patch_session_get, mock_response, no_backoff_sleep, monkeypatch):
+    """
+    Severity: Critical. Mock 500 on all attempts with MAX_RETRIES raised above its default.
+    Assert: The limit is honoured at runtime, backoff doubles per retry and
+    PriceCriticalError is raised after the last attempt.
+    """
+    monkeypatch.setattr('price_client.MAX_RETRIES', 5)
+    patch_session_get['return_value'] = mock_response(status_code=500)
     
-    with pytest.raises(PriceCriticalError) as excinfo:
+    with pytest.raises(PriceCriticalError, match=r"API down: Failed after 5 attempts"):
         get_hyperliquid_price("SOL")
         
-    assert "Failed after 3 attempts" in str(excinfo.value)
-    assert mock_get.call_count == MAX_RETRIES
+    assert patch_session_get['calls'] == 5
+    assert no_backoff_sleep.call_args_list == [call(0.5), call(1.0), call(2.0), call(4.0)]
 
 # ----------------------------------------------------
 # 3. Bad Data Cases (200 OK with bad content)
@@ -84,49 +134,43 @@ def test_api_down_500_critical_failure(mocker, mock_response):
     {"price": -100.0},        # price: -100 (Critical)
     {"price": None},          # price: null (Critical)
     {"value": 500},           # Missing 'price' field (Critical)
-])
-def test_bad_data_critical_cases(mocker, mock_response, bad_json):
+], ids=["negative", "null", "missing-field"])
+def test_bad_data_critical_cases(patch_session_get, mock_response, bad_json):
     """
     Severity: Critical. Response is 200, but data is invalid.
     Assert: Treat as critical and raise PriceCriticalError.
     """
-    mock_resp = mock_response(json_data=bad_json)
-    mocker.patch('requests.get', return_value=mock_resp)
+    patch_session_get['return_value'] = mock_response(json_data=bad_json)
     
-    with pytest.raises(PriceCriticalError) as excinfo:
+    with pytest.raises(PriceCriticalError, match="Bad data"):
         get_hyperliquid_price("LTC")
     
-    assert "Bad data" in str(excinfo.value)
-    
 # ----------------------------------------------------
 # 4. Rate Limit (429)
 # ----------------------------------------------------
 
-def test_rate_limit_429_fail_fast(mocker, mock_response):
+def test_rate_limit_429_fail_fast(patch_session_get, mock_response):
     """
     Severity: High. Mock a 429 response.
     Assert: Fails fast and signals rate limiting via RateLimitError.
     """
-    mock_resp = mock_response(
+    patch_session_get['return_value'] = mock_response(
         status_code=429, 
         headers={"Retry-After": "5"}
     )
-    mock_get = mocker.patch('requests.get', return_value=mock_resp)
     
-    with pytest.raises(RateLimitError) as excinfo:
+    with pytest.raises(RateLimitError, match=r"Rate limit exceeded\. Fail-fast chosen\."):
         get_hyperliquid_price("ARB")
         
-    assert "Rate limit exceeded. Fail-fast chosen." in str(excinfo.value)
     # Ensure it only tried once (fail fast)
-    assert mock_get.call_count == 1
+    assert patch_session_get['calls'] == 1
 
-def test_rate_limit_429_no_retry_after(mocker, mock_response):
+def test_rate_limit_429_no_retry_after(patch_session_get, mock_response):
     """
     Severity: High. Mock a 429 response missing the Retry-After header.
     Assert: Fails fast and signals rate limiting.
     """
-    mock_resp = mock_response(status_code=429, headers={})
-    mocker.patch('requests.get', return_value=mock_resp)
+    patch_session_get['return_value'] = mock_response(status_code=429, headers={})
     
     with pytest.raises(RateLimitError):
         get_hyperliquid_price("ARB")